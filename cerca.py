@@ -17,15 +17,46 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
 import argparse, ast, datetime, collections, re, pprint
-import math, urllib.request, os
+import math, urllib.request, urllib.error, os, pickle, threading, tempfile, hashlib
+from concurrent.futures import ThreadPoolExecutor
 from xml.etree import ElementTree
 from datetime import date, datetime, time
 import html
+import numpy as np
 
 MONTHLY_EVENTS_URL = 'http://w10.bcn.es/APPS/asiasiacache/peticioXmlAsia?id=103'
 TODAY_EVENTS_URL = 'http://w10.bcn.es/APPS/asiasiacache/peticioXmlAsia?id=199'
 BICING_URL = 'https://wservice.viabicing.cat/v1/getstations.php?v=1'
 
+FEED_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'cerca.pkl')
+feed_cache_lock = threading.Lock()
+
+DATE_RE = re.compile(r'[0-9]{2}/[0-9]{2}/[0-9]{4}')
+HOUR_RE = re.compile(r'[0-9]{2}\.[0-9]{2}')
+
+HTML_HEADER = (
+    '<html><body><table style="width: 100%; border: 1px solid black;">'
+    '<tr><th>Name</th><th>Address</th><th>Place</th><th>Date</th>'
+    '<th style="width: 25%">Stations with bikes</th><th style="width: 25%">Stations with slots</th></tr>'
+)
+HTML_FOOTER = """</table></body><style>
+    table {
+        border-collapse: collapse;
+        width: 100%;
+    }
+    th, td {
+        text-align: left;
+        padding: 8px;
+    }
+    tr:nth-child(even){
+        background-color: #f2f2f2
+    }
+    th {
+        background-color: #4CAF50;
+        color: white;
+    }
+    </style></html>"""
+
 LatLong = collections.namedtuple('LatLong', 'latitude longitude')
 
 def haversine_distance(origin, destination):
@@ -37,166 +68,282 @@ def haversine_distance(origin, destination):
     More info: https://en.wikipedia.org/wiki/Haversine_formula
     """
     earth_radius = 6371e3 # approx. radius
-    o_lon = math.radians(origin.longitude)
-    o_lat = math.radians(origin.latitude)
-    d_lon = math.radians(destination.longitude)
-    d_lat = math.radians(destination.latitude)
-    delta_lat = math.radians(destination.latitude - origin.latitude)
-    delta_long = math.radians(destination.longitude - origin.longitude)
+    o_lat, o_lon, d_lat, d_lon = map(math.radians, (origin.latitude, origin.longitude, destination.latitude, destination.longitude))
+    delta_lat = d_lat - o_lat
+    delta_long = d_lon - o_lon
     a = math.sin(delta_lat/2.0) ** 2 + math.cos(o_lat) * math.cos(d_lat) * math.sin(delta_long/2.0) ** 2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1.0-a))
+    c = 2 * math.asin(math.sqrt(min(a, 1.0))) # rounding can push a slightly over 1
     return earth_radius * c
 
+def iter_elements(source, tag):
+    """
+    Incrementally parse the XML document in the binary file object `source` and yield its `tag` elements.
+    The encoding is taken from the document's XML declaration
+
+    Each element is cleared once the caller is done with it, so the whole document is never kept in memory
+    """
+    for _, element in ElementTree.iterparse(source):
+        if element.tag == tag:
+            yield element
+            element.clear()
+
+def feed_cache_version():
+    """
+    Return the version of the cached feeds, derived from the attributes of the classes that are
+    pickled into the cache, so entries written by code with a different layout are never used
+    """
+    schema = (LatLong._fields, Event.__slots__, Station.__slots__, Stations.__slots__)
+    return hashlib.sha1(repr(schema).encode('utf-8')).hexdigest()
+
+def load_feed_cache():
+    """
+    Return the on-disk cache of feeds, a dict of `(feed_cache_version(), url): (etag, last_modified, payload)`
+    where `payload` is the pickled parsed feed. A missing or unreadable cache is just an empty one
+
+    The parsed feeds are pickled on their own, so the cache itself only holds builtin types and
+    can always be loaded, even when the classes the feeds were pickled with have changed
+    """
+    try:
+        with open(FEED_CACHE_PATH, 'rb') as cache_file:
+            cache = pickle.load(cache_file)
+    except Exception:
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+def fetch_feed(url, parse):
+    """
+    Download the feed at `url` and return `parse(response)`
+
+    The parsed result is cached on disk together with the feed's ETag and Last-Modified
+    headers, which are sent back on the next download: if the server answers 304 Not Modified
+    the cached result is returned without downloading nor parsing the feed again
+    """
+    version = feed_cache_version()
+    key = (version, url)
+    request = urllib.request.Request(url)
+    cached = load_feed_cache().get(key)
+    if cached is not None:
+        etag, last_modified, payload = cached
+        try:
+            cached = pickle.loads(payload)
+        except Exception:
+            # pickled by code that no longer matches this one, download the feed again
+            cached = None
+    if cached is not None:
+        if etag:
+            request.add_header('If-None-Match', etag)
+        if last_modified:
+            request.add_header('If-Modified-Since', last_modified)
+    try:
+        with urllib.request.urlopen(request) as response:
+            parsed = parse(response)
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+    except urllib.error.HTTPError as error:
+        if error.code == 304 and cached is not None:
+            return cached
+        raise
+    if etag or last_modified:
+        # feeds may be fetched concurrently, re-read the cache so no entry is lost
+        with feed_cache_lock:
+            cache = {k: v for k, v in load_feed_cache().items() if isinstance(k, tuple) and k[0] == version}
+            cache[key] = (etag, last_modified, pickle.dumps(parsed))
+            # the cache is only an optimization, not being able to write it is not an error
+            try:
+                os.makedirs(os.path.dirname(FEED_CACHE_PATH), exist_ok=True)
+                # a temporary file of our own, other cerca runs may be writing the cache too
+                fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(FEED_CACHE_PATH), suffix='.tmp')
+                try:
+                    with os.fdopen(fd, 'wb') as cache_file:
+                        pickle.dump(cache, cache_file)
+                    os.replace(temp_path, FEED_CACHE_PATH)
+                except BaseException:
+                    os.remove(temp_path)
+                    raise
+            except OSError:
+                pass
+    return parsed
+
+def non_negative_int(value):
+    """
+    `argparse` type for integer arguments that can't be negative
+    """
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError('{} is negative'.format(value))
+    return number
+
 def parse_args():
     parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     parser.add_argument('--key', type=str, required=True, help='Search terms')
-    parser.add_argument('--distance', type=int, required=False, help='Max. distance to the bicing stations', default=300)
+    parser.add_argument('--distance', type=non_negative_int, required=False, help='Max. distance to the bicing stations', default=300)
+    parser.add_argument('--stations', type=non_negative_int, required=False, help='Max. number of stations listed for every event, omit for no limit', default=None)
     parser.add_argument('--date', type=str, required=False, help='Event date', default=argparse.SUPPRESS)
     return vars(parser.parse_args())
 
 def get_bicing_stations():
     """
-    Load the list of Bicing stations and return a list of `Station` instances
+    Load the list of Bicing stations and return them as a `Stations` instance
+    """
+    return fetch_feed(BICING_URL, lambda stations: Stations.fromStations(Station.fromElementTree(station_tree) for station_tree in iter_elements(stations, 'station')))
+
+def nearby_stations(event_lats, event_lons, station_lats, station_lons, cos_station_lats, max_distance):
     """
-    stations = urllib.request.urlopen(BICING_URL).read().decode('utf-8')
-    stations_tree = ElementTree.fromstring(str(stations))
-    res= []
-    for station_tree in stations_tree.iter('station'):
-        station = Station.fromElementTree(station_tree)
-        res.append(station)
-    return res
-
-def set_nearest_stations(events, stations, max_distance):
+    Find, for all the events at once, the stations in a distance less or equal to `max_distance`.
+    The coordinates are NumPy arrays in radians, `cos_station_lats` the cosine of `station_lats`
+
+    Returns the result in CSR form: the stations near the i-th event are `indices[indptr[i]:indptr[i+1]]`,
+    sorted by their `distances`
+
+    The stations are indexed by latitude, so for every event only the ones in the
+    band of latitudes that can be within `max_distance` are considered, and of those only
+    the ones inside the bounding box of longitudes are measured
+    """
+    earth_radius = 6371e3 # approx. radius
+    # a point at distance d is never more than d/R radians of latitude away
+    max_angle = max_distance / earth_radius
+    by_latitude = np.argsort(station_lats, kind='stable')
+    lows = np.searchsorted(station_lats[by_latitude], event_lats - max_angle, side='left')
+    counts = np.searchsorted(station_lats[by_latitude], event_lats + max_angle, side='right') - lows
+    # a negative `max_distance` gives bands that end before they start, i.e. empty ones
+    counts = np.maximum(counts, 0)
+    # one (event, station) pair per station in the band of every event
+    pair_events = np.repeat(np.arange(len(event_lats)), counts)
+    band_starts = np.repeat(lows - (np.cumsum(counts) - counts), counts)
+    pair_stations = by_latitude[np.arange(len(pair_events)) + band_starts]
+    # and no more than asin(sin(d/R) / cos(lat)) of longitude, unless the circle contains a pole
+    cos_event_lats = np.cos(event_lats)
+    max_delta_lons = np.full(len(event_lats), np.inf)
+    if max_angle < math.pi/2:
+        boxed = cos_event_lats > math.sin(max_angle)
+        max_delta_lons[boxed] = np.arcsin(math.sin(max_angle) / cos_event_lats[boxed])
+    delta_lons = np.abs((station_lons[pair_stations] - event_lons[pair_events] + math.pi) % (2*math.pi) - math.pi)
+    boxed = delta_lons <= max_delta_lons[pair_events]
+    pair_events, pair_stations, delta_lons = pair_events[boxed], pair_stations[boxed], delta_lons[boxed]
+    delta_lats = station_lats[pair_stations] - event_lats[pair_events]
+    a = np.sin(delta_lats/2.0) ** 2 + cos_event_lats[pair_events] * cos_station_lats[pair_stations] * np.sin(delta_lons/2.0) ** 2
+    distances = earth_radius * 2 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    within = distances <= max_distance
+    pair_events, pair_stations, distances = pair_events[within], pair_stations[within], distances[within]
+    order = np.lexsort((pair_stations, distances, pair_events))
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(pair_events, minlength=len(event_lats)))))
+    return indptr, pair_stations[order], distances[order]
+
+def set_nearest_stations(events, stations, max_distance, top_k=None):
     """
     For every event set the stations with available bikes and slots that are
-    in a distance less or equal to `max_distance`
+    in a distance less or equal to `max_distance`. `stations` is a `Stations` instance
+
+    If `top_k` is given only the `top_k` nearest stations of each kind are kept
     """
-    for event in events:
-        if event.coords is None:
-            continue
-        for station in stations:
-            distance = haversine_distance(event.coords, station.coords)
-            if  distance <= max_distance:
-                if station.slots > 0:
-                    event.stations_with_slots.append((station, distance))
-                elif station.bikes > 0:
-                    event.stations_with_bikes.append((station, distance))
-        event.stations_with_slots.sort(key=lambda e: e[1])
-        event.stations_with_bikes.sort(key=lambda e: e[1])
+    if top_k is not None:
+        top_k = max(top_k, 0) # as `heapq.nsmallest`, a negative `top_k` keeps nothing
+    located = [event for event in events if event.coords is not None]
+    if not located:
+        return
+    event_lats = np.radians(np.array([event.coords.latitude for event in located]))
+    event_lons = np.radians(np.array([event.coords.longitude for event in located]))
+    indptr, indices, distances = nearby_stations(event_lats, event_lons, stations.lat_rad, stations.lon_rad, stations.cos_lat, max_distance)
+    has_slots = stations.slots > 0
+    has_bikes = (stations.bikes > 0) & ~has_slots
+    for event, start, end in zip(located, indptr[:-1].tolist(), indptr[1:].tolist()):
+        near, near_distances = indices[start:end], distances[start:end]
+        for nearest, available in ((event.stations_with_slots, has_slots), (event.stations_with_bikes, has_bikes)):
+            # `nearby_stations` already returns them sorted by distance, and `tolist` hands
+            # back plain Python numbers instead of one NumPy scalar per element
+            selected = available[near]
+            nearest.extend((stations[i], distance) for i, distance in zip(near[selected][:top_k].tolist(), near_distances[selected][:top_k].tolist()))
+
+def compile_search_terms(search_terms):
+    """
+    Walk the `search_terms` once and return a function that tells if an event matches them.
+    Use it instead of `check_event` when the same terms are checked against many events
+
+    All the terms are searched at the same time with a single regular expression over the
+    event fields, and the conjunctions and disjunctions are then evaluated on the terms found
+    """
+    terms = set()
+    def compile_node(node):
+        if isinstance(node, str):
+            terms.add(node)
+            return lambda found: node in found
+        elif isinstance(node, list):
+            #conjuncions
+            evaluators = [compile_node(elem) for elem in node]
+            return lambda found: all(evaluator(found) for evaluator in evaluators)
+        elif isinstance(node, tuple):
+            #disjuncions
+            evaluators = [compile_node(elem) for elem in node]
+            return lambda found: any(evaluator(found) for evaluator in evaluators)
+        return lambda found: False
+    evaluate = compile_node(search_terms)
+    if not terms:
+        return lambda event: evaluate(set())
+    # the longest term wins when several start at the same position, so a hit also
+    # implies every shorter term contained in it
+    terms = sorted(terms, key=len, reverse=True)
+    pattern = re.compile('(?=({}))'.format('|'.join(map(re.escape, terms))))
+    implied = {term: {other for other in terms if other in term} for term in terms}
+    def matches(event):
+        found = set()
+        for term in set(pattern.findall(event.name + '\0' + event.place + '\0' + event.address)):
+            found |= implied[term]
+        return evaluate(found)
+    return matches
 
 def check_event(event, search_terms):
     """
     Returns if the event matches the passed `search_terms`
     """
-    if isinstance(search_terms, str):
-        return (search_terms in event.name or search_terms in event.place or search_terms in event.address)
-    elif isinstance(search_terms, list):
-        #conjuncions
-        for elem in search_terms:
-            if not check_event(event, elem):
-                return False
-        return True
-    elif isinstance(search_terms, tuple):
-        #disjuncions
-        for elem in search_terms:
-            if check_event(event, elem):
-                return True
-        return False
-    return False
+    return compile_search_terms(search_terms)(event)
+
+def parse_events(source):
+    """
+    Parse the events feed in the binary file object `source` and return a list of `Event` instances
+    """
+    return [Event.fromElementTree(event_tree) for event_tree in iter_elements(source, 'acte')]
 
 def find_monthly_events(search_terms, date):
     """
     Search in the list of montly events the events for a given date and terms and return a list of `Event` instances
     """
-    events = urllib.request.urlopen(MONTHLY_EVENTS_URL).read().decode('iso-8859-1')
-    events_tree = ElementTree.fromstring(str(events))
-    res = []
-    for event_tree in events_tree.iter('acte'):
-        event = Event.fromElementTree(event_tree)
-        if event.date == date and check_event(event, search_terms):
-            res.append(event)
-    return res
+    matches = compile_search_terms(search_terms)
+    return [event for event in fetch_feed(MONTHLY_EVENTS_URL, parse_events) if event.date == date and matches(event)]
 
 def find_today_events(search_terms):
     """
     Search in the list of events for today the events that match a set of terms and return a list of `Event` instances
     """
-    events = urllib.request.urlopen(TODAY_EVENTS_URL).read().decode('iso-8859-1')
-    events_tree = ElementTree.fromstring(str(events))
-    res = []
-    for event_tree in events_tree.iter('acte'):
-        event = Event.fromElementTree(event_tree)
-        if check_event(event, search_terms):
-            res.append(event)
-    return res
+    matches = compile_search_terms(search_terms)
+    return [event for event in fetch_feed(TODAY_EVENTS_URL, parse_events) if matches(event)]
 
 def write_html(events):
     """
     Write a list of `Event` instances into a index.html file
     """
-    html = ElementTree.Element('html')
-    html_tree = ElementTree.ElementTree(html)
-    body = ElementTree.SubElement(html, 'body')
-    table = ElementTree.SubElement(body, 'table')
-    table.set('style', 'width: 100%; border: 1px solid black;')
-    row = ElementTree.SubElement(table, 'tr')
-    name = ElementTree.SubElement(row, 'th')
-    name.text = 'Name'
-    address = ElementTree.SubElement(row, 'th')
-    address.text = 'Address'
-    place = ElementTree.SubElement(row, 'th')
-    place.text = 'Place'
-    date = ElementTree.SubElement(row, 'th')
-    date.text = 'Date'
-    stations_with_bikes = ElementTree.SubElement(row, 'th')
-    stations_with_bikes.set('style', 'width: 25%')
-    stations_with_bikes.text = 'Stations with bikes'
-    stations_with_slots = ElementTree.SubElement(row, 'th')
-    stations_with_slots.set('style', 'width: 25%')
-    stations_with_slots.text = 'Stations with slots'
+    parts = [HTML_HEADER]
+    # the same station is usually near several events, escape its address only once
+    addresses = {}
+    def station_address(station):
+        key = (station.street, station.number)
+        if key not in addresses:
+            addresses[key] = html.escape(f'{station.street}, {station.number}', quote=False)
+        return addresses[key]
     for event in events:
-        row = ElementTree.SubElement(table, 'tr')
-        name = ElementTree.SubElement(row, 'td')
-        name.text = event.name
-        address = ElementTree.SubElement(row, 'td')
-        address.text = event.address
-        place = ElementTree.SubElement(row, 'td')
-        place.text = event.place
-        date = ElementTree.SubElement(row, 'td')
-        date.text = event.date.strftime('%d/%m/%Y') + ' ' + (event.hour.strftime('%H:%M') if event.hour else '')
-        stations_with_bikes = ElementTree.SubElement(row, 'td')
-        bikes_list = ElementTree.SubElement(stations_with_bikes, 'ul')
-        for i in range(len(event.stations_with_bikes)):
-            station = event.stations_with_bikes[i][0]
-            distance = event.stations_with_bikes[i][1]
-            bike = ElementTree.SubElement(bikes_list, 'li')
-            bike.text = station.street + ', ' + str(station.number) + '. Bikes: ' + str(station.bikes) + '. Distance: ' + str(round(distance, 2)) + 'm'
-        stations_with_slots = ElementTree.SubElement(row, 'td')
-        slots_list = ElementTree.SubElement(stations_with_slots, 'ul')
-        for i in range(len(event.stations_with_slots)):
-            station = event.stations_with_slots[i][0]
-            distance = event.stations_with_slots[i][1]
-            slot = ElementTree.SubElement(slots_list, 'li')
-            slot.text = station.street + ', ' + str(station.number) + '. Slots: ' + str(station.slots) + '. Distance: ' + str(round(distance, 2)) + 'm'
-    style = ElementTree.SubElement(html, 'style')
-    style.text = """
-    table {
-        border-collapse: collapse;
-        width: 100%;
-    }
-    th, td {
-        text-align: left;
-        padding: 8px;
-    }
-    tr:nth-child(even){
-        background-color: #f2f2f2
-    }
-    th {
-        background-color: #4CAF50;
-        color: white;
-    }
-    """
-    html_tree.write(open('index.html', 'wb'), method='html')
+        date = event.date.strftime('%d/%m/%Y') + ' ' + (event.hour.strftime('%H:%M') if event.hour else '')
+        parts.append(f'<tr><td>{html.escape(event.name, quote=False)}</td><td>{html.escape(event.address, quote=False)}</td>'
+                     f'<td>{html.escape(event.place, quote=False)}</td><td>{date}</td><td><ul>')
+        for station, distance in event.stations_with_bikes:
+            parts.append(f'<li>{station_address(station)}. Bikes: {station.bikes}. Distance: {distance:.2f}m</li>')
+        parts.append('</ul></td><td><ul>')
+        for station, distance in event.stations_with_slots:
+            parts.append(f'<li>{station_address(station)}. Slots: {station.slots}. Distance: {distance:.2f}m</li>')
+        parts.append('</ul></td></tr>')
+    parts.append(HTML_FOOTER)
+    # non ASCII characters are written as character references, so the file is valid in any encoding
+    document = ''.join(parts).encode('ascii', 'xmlcharrefreplace')
+    with open('index.html', 'wb') as index:
+        index.write(document)
     print('Results saved into {}'.format(os.path.abspath('./index.html')))
 
 def main():
@@ -207,38 +354,50 @@ def main():
         events = find_monthly_events(search_terms, date)
         #pprint.pprint(events)
     else:
-        events = find_today_events(search_terms)
-        stations = get_bicing_stations()
-        set_nearest_stations(events, stations, args['distance'])
+        # both feeds are independent, download them at the same time
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            events = executor.submit(find_today_events, search_terms)
+            stations = executor.submit(get_bicing_stations)
+            events, stations = events.result(), stations.result()
+        set_nearest_stations(events, stations, args['distance'], args['stations'])
         #pprint.pprint(events)
     write_html(events)
 
 class Event:
 
-    def __init__(self, **kwargs):
-        allowed_keys = set(['name', 'address', 'date', 'hour', 'place', 'coords'])
-        self.__dict__.update((key, None) for key in allowed_keys)
-        self.__dict__.update((k, v) for k, v in kwargs.items() if k in allowed_keys)
+    __slots__ = ('name', 'address', 'date', 'hour', 'place', 'coords', 'stations_with_bikes', 'stations_with_slots')
+
+    def __init__(self, name=None, address=None, date=None, hour=None, place=None, coords=None):
+        self.name = name
+        self.address = address
+        self.date = date
+        self.hour = hour
+        self.place = place
+        self.coords = coords
         self.stations_with_bikes = []
         self.stations_with_slots = []
     
     @staticmethod
     def fromElementTree(tree):
-        data_proper_acte = tree.find('data').find('data_proper_acte').text
-        match = re.match('[0-9]{2}\/[0-9]{2}\/[0-9]{4}', data_proper_acte)
-        date = match.group(0) 
-        date = datetime.strptime(date, '%d/%m/%Y')
-        hour = tree.find('data').find('hora_inici')
+        data = tree.find('data')
+        data_proper_acte = data.find('data_proper_acte').text
+        date = DATE_RE.match(data_proper_acte).group(0)
+        # dd/mm/yyyy, slicing is much cheaper than strptime
+        date = datetime(int(date[6:10]), int(date[3:5]), int(date[0:2]))
+        hour = data.find('hora_inici')
         if hour is not None:
             hour = hour.text
         else:
-            match = re.search('[0-9]{2}\.[0-9]{2}', data_proper_acte)
+            match = HOUR_RE.search(data_proper_acte)
             if match is not None:
                 hour = match.group(0)
-        hour = datetime.strptime(hour, '%H.%M').time() if hour is not None else None
+        if hour is not None:
+            hours, minutes = hour.split('.')
+            hour = time(int(hours), int(minutes))
         name = html.unescape(tree.find('nom').text)
-        place = html.unescape(tree.find('lloc_simple').find('nom').text)
-        address_tree = tree.find('lloc_simple').find('adreca_simple')
+        lloc_simple = tree.find('lloc_simple')
+        place = html.unescape(lloc_simple.find('nom').text)
+        address_tree = lloc_simple.find('adreca_simple')
         address = ""
         for item in address_tree.iter():
             if item.tag != 'coordenades' and item.text:
@@ -257,28 +416,78 @@ class Event:
         return Event(date=date, hour=hour, name=name, place=place, address=address, coords=latlong)
 
     def __repr__(self):
-        return str(self.__dict__)
+        return str({key: getattr(self, key) for key in self.__slots__})
 
 class Station:
 
-    def __init__(self, **kwargs):
-        allowed_keys = set(['coords', 'slots', 'bikes', 'street', 'number'])
-        self.__dict__.update((key, None) for key in allowed_keys)
-        self.__dict__.update((k, v) for k, v in kwargs.items() if k in allowed_keys)
+    __slots__ = ('coords', 'slots', 'bikes', 'street', 'number')
+
+    def __init__(self, coords=None, slots=None, bikes=None, street=None, number=None):
+        self.coords = coords
+        self.slots = slots
+        self.bikes = bikes
+        self.street = street
+        self.number = number
 
     @staticmethod
     def fromElementTree(tree):
-        slots = int(tree.find('slots').text)
-        bikes = int(tree.find('bikes').text)
-        lat = float(tree.find('lat').text)
-        lon = float(tree.find('long').text)
+        fields = {child.tag: child.text for child in tree} # one pass instead of a find per field
+        slots = int(fields['slots'])
+        bikes = int(fields['bikes'])
+        lat = float(fields['lat'])
+        lon = float(fields['long'])
         latlong = LatLong(latitude=lat, longitude=lon)
-        street = html.unescape(tree.find('street').text)
-        number = tree.find('streetNumber').text
+        street = html.unescape(fields['street'])
+        number = fields['streetNumber']
         return Station(slots=slots, bikes=bikes, coords=latlong, street=street, number=number)
 
     def __repr__(self):
-        return str(self.__dict__)
+        return str({key: getattr(self, key) for key in self.__slots__})
+
+class Stations:
+    """
+    Column oriented table of Bicing stations, one NumPy array (or list) per attribute
+
+    Indexing it returns the `Station` at that position. The coordinates in radians and the
+    cosine of the latitudes are computed once here instead of on every search
+    """
+
+    __slots__ = ('lat', 'lon', 'slots', 'bikes', 'street', 'number', 'lat_rad', 'lon_rad', 'cos_lat')
+
+    def __init__(self, lat, lon, slots, bikes, street, number):
+        self.lat = lat
+        self.lon = lon
+        self.slots = slots
+        self.bikes = bikes
+        self.street = street
+        self.number = number
+        self.lat_rad = np.radians(lat)
+        self.lon_rad = np.radians(lon)
+        self.cos_lat = np.cos(self.lat_rad)
+
+    @staticmethod
+    def fromStations(stations):
+        lat, lon, slots, bikes, street, number = [], [], [], [], [], []
+        for station in stations:
+            lat.append(station.coords.latitude)
+            lon.append(station.coords.longitude)
+            slots.append(station.slots)
+            bikes.append(station.bikes)
+            street.append(station.street)
+            number.append(station.number)
+        return Stations(lat=np.array(lat, dtype=float), lon=np.array(lon, dtype=float),
+                        slots=np.array(slots, dtype=int), bikes=np.array(bikes, dtype=int),
+                        street=street, number=number)
+
+    def __len__(self):
+        return len(self.street)
+
+    def __getitem__(self, i):
+        latlong = LatLong(latitude=float(self.lat[i]), longitude=float(self.lon[i]))
+        return Station(slots=int(self.slots[i]), bikes=int(self.bikes[i]), coords=latlong, street=self.street[i], number=self.number[i])
+
+    def __repr__(self):
+        return str([self[i] for i in range(len(self))])
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()